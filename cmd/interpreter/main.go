@@ -3,6 +3,7 @@ package main
 import (
 	"bytes"
 	"context"
+	"crypto/sha256"
 	"errors"
 	"flag"
 	"fmt"
@@ -12,6 +13,7 @@ import (
 	"image/jpeg"
 	"os"
 	"strings"
+	"sync/atomic"
 	"time"
 
 	"cloud.google.com/go/vision/apiv1"
@@ -36,23 +38,36 @@ func init() {
 	log.Logger = log.Output(zerolog.ConsoleWriter{Out: os.Stdout, TimeFormat: time.RFC3339})
 }
 
+// subsLayout is the word-wrapped subtitles for a given translation and window width.
+type subsLayout struct {
+	subs     string
+	width    int
+	text     string
+	box      image.Point
+	rendered *ebiten.Image
+}
+
 type App struct {
 	visionClient        *vision.ImageAnnotatorClient
 	windowTitle         string
 	refreshRate         time.Duration
-	lastUpdate          time.Time
 	subsFont            font.Face
+	subsLineHeight      int
+	lastDigest          [sha256.Size]byte
 	lastText            string
-	subs                string
+	subs                atomic.Value // string: written by capture, read by Draw
 	confidenceThreshold float32
 	translator          translate.Translator
 	debug               bool
 	subsFontColor       color.RGBA
 	subsBackgroundColor color.RGBA
+	width               int
+	layout              subsLayout   // only used by Draw
+	jpegBuffer          bytes.Buffer // only used by the capture goroutine
 }
 
 func filterTextByConfidence(annotation *visionpb.TextAnnotation, threshold float32) string {
-	var buffer bytes.Buffer
+	var buffer strings.Builder
 	for _, page := range annotation.Pages {
 		for _, block := range page.Blocks {
 			for _, paragraph := range block.Paragraphs {
@@ -74,18 +89,18 @@ func (a *App) screenshot(windowTitle string) (image.Image, error) {
 	return captured.Captured.CaptureWindowByTitle(windowTitle, captured.CropTitle)
 }
 
-func (a *App) annotate(image image.Image) (string, error) {
-	// Encode to JPEG
-	var buffer bytes.Buffer
-	if err := jpeg.Encode(&buffer, image, &jpeg.Options{Quality: 85}); err != nil {
-		return "", err
+// encode compresses the screenshot to JPEG, reusing the buffer from the previous refresh.
+func (a *App) encode(image image.Image) ([]byte, error) {
+	a.jpegBuffer.Reset()
+	if err := jpeg.Encode(&a.jpegBuffer, image, &jpeg.Options{Quality: 85}); err != nil {
+		return nil, err
 	}
+	return a.jpegBuffer.Bytes(), nil
+}
 
-	// Create image
-	img, err := vision.NewImageFromReader(&buffer)
-	if err != nil {
-		return "", err
-	}
+func (a *App) annotate(encoded []byte) (string, error) {
+	// Create image straight from the encoded bytes, NewImageFromReader would copy them
+	img := &visionpb.Image{Content: encoded}
 
 	// Extract text from image
 	annotation, err := a.visionClient.DetectDocumentText(context.Background(), img, nil)
@@ -108,76 +123,132 @@ func (a *App) annotate(image image.Image) (string, error) {
 	return extractedText, nil
 }
 
-func (a *App) Update() error {
-	if inpututil.IsKeyJustPressed(ebiten.KeyT) {
-		ebiten.SetWindowDecorated(!ebiten.IsWindowDecorated())
+// refresh captures the window, extracts its text and translates it.
+func (a *App) refresh(now time.Time) {
+	screenshot, err := a.screenshot(a.windowTitle)
+	if err != nil {
+		log.Fatal().Err(err).Send()
 	}
 
-	// Check if it's time to refresh
-	if !time.Now().After(a.lastUpdate.Add(a.refreshRate)) {
-		return nil
+	encoded, err := a.encode(screenshot)
+	if err != nil {
+		log.Fatal().Err(err).Send()
 	}
-	a.lastUpdate = time.Now()
 
-	go func() {
-		screenshot, err := a.screenshot(a.windowTitle)
-		if err != nil {
+	if a.debug { // Save screenshot to disk, as sent to Cloud Vision
+		if err := os.WriteFile(fmt.Sprintf("screenshot-%d.jpg", now.UnixNano()), encoded, 0644); err != nil {
 			log.Fatal().Err(err).Send()
 		}
+	}
 
-		if a.debug { // Save screenshot to disk
-			f, err := os.Create(fmt.Sprintf("screenshot-%d.jpg", a.lastUpdate.UnixNano()))
-			if err != nil {
-				log.Fatal().Err(err).Send()
-			}
-			defer f.Close()
-			if err = jpeg.Encode(f, screenshot, &jpeg.Options{Quality: 85}); err != nil {
-				log.Fatal().Err(err).Send()
-			}
-		}
+	// An identical screenshot yields the same text, so skip the Cloud Vision call
+	digest := sha256.Sum256(encoded)
+	if digest == a.lastDigest {
+		return
+	}
+	a.lastDigest = digest
 
-		text, err := a.annotate(screenshot)
-		if err != nil {
-			log.Fatal().Err(err).Send()
-		}
-		if text == a.lastText {
-			return
-		}
-		if text == "" {
-			a.subs = ""
-			return
-		}
+	text, err := a.annotate(encoded)
+	if err != nil {
+		log.Fatal().Err(err).Send()
+	}
+	if text == a.lastText {
+		return
+	}
+	if text == "" {
+		a.lastText = ""
+		a.setSubs("")
+		return
+	}
 
-		translation, err := a.translator.Translate(text)
-		if err != nil {
-			log.Fatal().Err(err).Send()
-		}
-		log.Info().Msgf("translated text: %s", translation)
+	translation, err := a.translator.Translate(text)
+	if err != nil {
+		log.Fatal().Err(err).Send()
+	}
+	log.Info().Msgf("translated text: %s", translation)
 
-		a.lastText = text
-		a.subs = translation
-	}()
+	a.lastText = text
+	a.setSubs(translation)
+}
 
+// setSubs publishes the subtitles and schedules a redraw, unless they are unchanged.
+func (a *App) setSubs(subs string) {
+	if current, _ := a.subs.Load().(string); current == subs {
+		return
+	}
+	a.subs.Store(subs)
+	ebiten.ScheduleFrame()
+}
+
+// capture refreshes the subtitles on its own goroutine, so a slow screenshot,
+// OCR or translation never stalls the game loop. Ticks are dropped while a
+// refresh is still running instead of piling up concurrent refreshes.
+func (a *App) capture() {
+	ticker := time.NewTicker(a.refreshRate)
+	defer ticker.Stop()
+	for now := time.Now(); ; now = <-ticker.C {
+		a.refresh(now)
+	}
+}
+
+func (a *App) Update() error {
+	if inpututil.IsKeyJustPressed(ebiten.KeyT) {
+		ebiten.SetWindowDecorated(!ebiten.IsWindowDecorated())
+	}
 	return nil
 }
 
 func (a *App) Draw(screen *ebiten.Image) {
-	width, height := ebiten.WindowSize()
+	width := a.width
+	subs, _ := a.subs.Load().(string)
 	if ebiten.IsWindowDecorated() {
-		ebitenutil.DrawRect(screen, 0, 0, float64(width), float64(height), color.Black)
+		screen.Fill(color.Black)
 		message := "Press T to toggle window"
-		if a.subs == "" {
+		if subs == "" {
 			message += "\n[no text detected]"
 		}
 		ebitenutil.DebugPrint(screen, message)
 	}
 
-	if a.subs == "" {
+	if subs == "" {
 		return
 	}
 
+	if a.layout.subs != subs || a.layout.width != width {
+		if a.layout.rendered != nil {
+			a.layout.rendered.Dispose()
+		}
+		a.layout = a.wrap(subs, width)
+		a.layout.rendered = a.render(a.layout)
+	}
+	if a.layout.rendered == nil {
+		return
+	}
+
+	x := 0
+	if a.layout.box.X < width {
+		x = (width - a.layout.box.X) / 2
+	}
+	op := &ebiten.DrawImageOptions{}
+	op.GeoM.Translate(float64(x), 0)
+	screen.DrawImage(a.layout.rendered, op)
+}
+
+// render draws the subtitles box into its own image once, so Draw only has to blit it.
+func (a *App) render(layout subsLayout) *ebiten.Image {
+	if layout.box.X <= 0 {
+		return nil
+	}
+	rendered := ebiten.NewImage(layout.box.X, layout.box.Y)
+	ebitenutil.DrawRect(rendered, 0, 0, float64(layout.box.X), float64(layout.box.Y), a.subsBackgroundColor)
+	text.Draw(rendered, layout.text, a.subsFont, 0, a.subsLineHeight, a.subsFontColor)
+	return rendered
+}
+
+// wrap breaks subs into lines that fit in width and measures the resulting box.
+func (a *App) wrap(subs string, width int) subsLayout {
 	var line, subtitles bytes.Buffer
-	for _, word := range strings.Fields(a.subs) {
+	for _, word := range strings.Fields(subs) {
 		bound := text.BoundString(a.subsFont, line.String()+word)
 		if bound.Dx() > width {
 			subtitles.WriteString(line.String())
@@ -190,17 +261,17 @@ func (a *App) Draw(screen *ebiten.Image) {
 	subtitles.WriteString(line.String())
 
 	bound := text.BoundString(a.subsFont, subtitles.String())
-	boxSize := image.Point{X: bound.Max.X, Y: bound.Dy() + a.subsFont.Metrics().Height.Round()}
-
-	x := 0
-	if boxSize.X < width {
-		x = (width - boxSize.X) / 2
+	return subsLayout{
+		subs:  subs,
+		width: width,
+		text:  subtitles.String(),
+		box:   image.Point{X: bound.Max.X, Y: bound.Dy() + a.subsLineHeight},
 	}
-	ebitenutil.DrawRect(screen, float64(x), float64(0), float64(boxSize.X), float64(boxSize.Y), a.subsBackgroundColor)
-	text.Draw(screen, subtitles.String(), a.subsFont, x, a.subsFont.Metrics().Height.Round(), a.subsFontColor)
 }
 
 func (a *App) Layout(outsideWidth, outsideHeight int) (int, int) {
+	// Keep the window width around so Draw doesn't have to query it every frame
+	a.width = outsideWidth
 	return outsideWidth, outsideHeight
 }
 
@@ -270,11 +341,13 @@ func main() {
 	ebiten.SetScreenTransparent(true)
 	ebiten.SetWindowFloating(true)
 	ebiten.SetWindowResizingMode(ebiten.WindowResizingModeEnabled)
+	ebiten.SetFPSMode(ebiten.FPSModeVsyncOffMinimum) // Only redraw on input or when the subtitles change
 
 	app := &App{
 		visionClient:        visionClient,
 		translator:          translator,
 		subsFont:            fontFace,
+		subsLineHeight:      fontFace.Metrics().Height.Round(),
 		subsFontColor:       fontColor,
 		subsBackgroundColor: backgroundColor,
 		windowTitle:         config.WindowTitle,
@@ -282,6 +355,7 @@ func main() {
 		confidenceThreshold: config.ConfidenceThreshold,
 		debug:               config.Debug,
 	}
+	go app.capture()
 	if err := ebiten.RunGame(app); err != nil {
 		log.Fatal().Err(err).Send()
 	}
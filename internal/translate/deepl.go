@@ -5,7 +5,6 @@ import (
 	"golang.org/x/text/language"
 	"net/http"
 	"net/url"
-	"strings"
 )
 
 const (
@@ -13,6 +12,7 @@ const (
 )
 
 type DeepL struct {
+	client            *http.Client
 	target            language.Tag
 	authenticationKey string
 }
@@ -22,7 +22,7 @@ func NewDeepL(translateTo, authenticationKey string) (*DeepL, error) {
 	if err != nil {
 		return nil, err
 	}
-	return &DeepL{language, authenticationKey}, nil
+	return &DeepL{&http.Client{}, language, authenticationKey}, nil
 }
 
 type DeepLResponse struct {
@@ -35,22 +35,17 @@ type Translations struct {
 }
 
 func (d *DeepL) Translate(source string) (string, error) {
-	u, _ := url.Parse(apiURL)
-
 	urlData := url.Values{}
 	urlData.Set("auth_key", d.authenticationKey)
 	urlData.Set("target_lang", d.target.String())
 	urlData.Set("text", source)
 
-	client := &http.Client{}
-	r, _ := http.NewRequest(http.MethodPost, u.String(), strings.NewReader(urlData.Encode())) // URL-encoded payload
-	r.Header.Add("Content-Type", "application/x-www-form-urlencoded")
-
-	resp, err := client.Do(r)
-	defer resp.Body.Close()
+	// Reuse the same client so the connection to DeepL is kept alive between translations
+	resp, err := d.client.PostForm(apiURL, urlData) // URL-encoded payload
 	if err != nil {
 		return "", err
 	}
+	defer resp.Body.Close()
 
 	var deepL DeepLResponse
 	if err := json.NewDecoder(resp.Body).Decode(&deepL); err != nil {
@@ -64,4 +59,6 @@ func (d *DeepL) Translate(source string) (string, error) {
 	return deepL.Translations[0].Text, nil
 }
 
-func (d *DeepL) Close() {}
+func (d *DeepL) Close() {
+	d.client.CloseIdleConnections()
+}